@@ -89,6 +89,10 @@ CHARACTER_SHEET_ICON = "\U000F0128"
 LOCATIONS_ICON = "\uEE69"
 GOLD_ICON = "\uE26B"
 
+# --- Pause Menu ---
+PAUSE_MENU_OPTIONS = ("Resume", "Save Game", "Load Game", "Quit to Title")
+ITEM_OPTIONS = ("Use", "Drop")
+
 # --- CFE Archetype Data ---
 ARCHETYPES = {
     "Warrior": {
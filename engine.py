@@ -1,12 +1,12 @@
 # engine.py - Complete revised CFE implementation with targeting
 import pygame
-import math
 import json
 import os
+import numpy as np
 from config import *
 from ui import (
     draw_panel, draw_tabs, draw_log_panel, draw_equipment_panel, 
-    draw_inventory_panel, draw_text, draw_character_sheet_panel, 
+    draw_inventory_panel, draw_character_sheet_panel, 
     draw_locations_panel, draw_quests_panel, draw_quest_details_window, 
     draw_level_up_window, draw_item_options_window, draw_equipment_selection_window, 
     draw_pause_menu_window, draw_spells_panel, draw_targeting_overlay
@@ -15,8 +15,37 @@ from world_generation import generate_overworld
 from world_generation import generate_cfe_dungeon
 from world_generation import Tile
 from entities import Monster, NPC, Player, roll_dice
+from items import create_random_treasure
 from spells import get_spell_by_name, CORE_SPELLS
 
+# Arrow key -> (dx, dy) cursor/movement step
+ARROW_DELTAS = {
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0)
+}
+
+INTERACT_RANGE_SQ = 2 # Squared distance: only the 8 surrounding tiles are in reach
+CHEST_TREASURE_RANGE = (25, 100) # Gold value range of chest loot
+
+def held_arrow_delta():
+    """Returns the step for the held arrow key (up, down, left, right priority), or (0, 0)."""
+    keys = pygame.key.get_pressed()
+    for key, delta in ARROW_DELTAS.items():
+        if keys[key]:
+            return delta
+    return (0, 0)
+
+def tiles_in_radius(cx, cy, radius, width, height):
+    """Returns the set of map tiles within a Euclidean radius of (cx, cy)."""
+    x0, x1 = max(0, cx - radius), min(width, cx + radius + 1)
+    y0, y1 = max(0, cy - radius), min(height, cy + radius + 1)
+    dx = np.arange(x0, x1)[:, None] - cx
+    dy = np.arange(y0, y1)[None, :] - cy
+    xs, ys = np.nonzero(dx * dx + dy * dy <= radius * radius)
+    return set(zip((xs + x0).tolist(), (ys + y0).tolist()))
+
 class Game:
     """The main game engine class with CFE integration and spell targeting."""
     def __init__(self, screen, font, clock, player):
@@ -29,6 +58,7 @@ class Game:
         # --- UI State ---
         self.input_focus = 'world'
         self.panel_tabs = [CHARACTER_SHEET_ICON, EQUIPMENT_ICON, INVENTORY_ICON, SPELLS_ICON, QUESTS_ICON, LOCATIONS_ICON]
+        self.panel_tab_index = {tab: i for i, tab in enumerate(self.panel_tabs)}
         self.active_panel = CHARACTER_SHEET_ICON
         self.inventory_selected_index = 0
         self.equipment_selected_index = 0
@@ -45,8 +75,60 @@ class Game:
         self.targeting_spell = None
         self.target_cursor = (0, 0)
         self.valid_targets = []
-        self.spell_range_tiles = []
-        self.spell_area_tiles = []
+        self.spell_range_tiles = set()
+        self.spell_area_tiles = set()
+        self.spell_area_stale = False # Cursor moved since spell_area_tiles was built
+        
+        # --- Key Dispatch Tables ---
+        self.state_handlers = {
+            'playing': self.handle_playing_input,
+            'looking': self.handle_playing_input,
+            'pause_menu': self.handle_pause_menu_input,
+            'level_up': self.handle_level_up_input,
+            'show_quest_details': self.handle_quest_details_input,
+            'show_item_options': self.handle_item_options_input,
+            'select_item_to_equip': self.handle_equip_selection_input
+        }
+        self.playing_keys = {
+            pygame.K_ESCAPE: self.handle_escape,
+            pygame.K_TAB: self.cycle_input_focus
+        }
+        self.focus_keys = {
+            'log': {
+                pygame.K_UP: self.scroll_log_up,
+                pygame.K_DOWN: self.scroll_log_down
+            },
+            'world': {
+                pygame.K_RETURN: self.interact_at_look_cursor,
+                pygame.K_l: self.toggle_look_mode,
+                pygame.K_r: self.rest_player
+            }
+        }
+        self.pause_menu_keys = {
+            pygame.K_UP: self.pause_menu_previous,
+            pygame.K_DOWN: self.pause_menu_next,
+            pygame.K_ESCAPE: self.resume_game,
+            pygame.K_RETURN: self.select_pause_option
+        }
+        self.pause_menu_actions = (self.resume_game, self.save_from_menu, self.load_from_menu, self.quit_to_title) # Same order as PAUSE_MENU_OPTIONS
+        self.targeting_keys = {
+            pygame.K_ESCAPE: self.cancel_spell_targeting,
+            pygame.K_RETURN: self.confirm_spell_target
+        }
+        self.panel_tab_steps = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1}
+        self.item_option_keys = {
+            pygame.K_UP: self.item_option_previous,
+            pygame.K_DOWN: self.item_option_next,
+            pygame.K_ESCAPE: self.resume_game,
+            pygame.K_RETURN: self.select_item_option
+        }
+        self.item_option_actions = (self.use_selected_item, self.drop_selected_item) # Same order as ITEM_OPTIONS
+        self.equip_selection_keys = {
+            pygame.K_UP: self.equip_selection_previous,
+            pygame.K_DOWN: self.equip_selection_next,
+            pygame.K_ESCAPE: self.resume_game,
+            pygame.K_RETURN: self.equip_selected_item
+        }
         
         # --- UI Rects ---
         self.game_rect = pygame.Rect(20, 20, 860, 540)
@@ -57,6 +139,14 @@ class Game:
         panel_height = SCREEN_HEIGHT - panel_y - 20
         self.right_panel_rect = pygame.Rect(900, panel_y, 360, panel_height)
         self.game_surface = pygame.Surface(self.game_rect.size)
+        # Screen areas covered by the tab strip (active tab is raised 5px) and the log with its header
+        self.tabs_area = self.right_panel_tabs_rect.inflate(0, 10)
+        log_header_height = self.font.get_height() + 5
+        self.log_area = pygame.Rect(self.log_rect.left, self.log_rect.top - log_header_height, self.log_rect.width, self.log_rect.height + log_header_height)
+        self.glyph_cache = {} # (char, color) -> rendered glyph surface
+        self.terrain_surface = None # Whole current map pre-rendered, see render_terrain()
+        self.terrain_map = None # The map terrain_surface was rendered from
+        self.ui_cache = {} # Region name -> (state, snapshot) for UI that rarely changes
 
         # --- Game State ---
         self.game_state = 'playing'
@@ -78,6 +168,7 @@ class Game:
         self.game_map, player_start, self.monsters, self.places = generate_overworld(self.map_width, self.map_height)
         self.player.x, self.player.y = player_start
         self.all_entities = [self.player] + self.monsters
+        self.index_entity_positions()
         self.message_log = [
             ("Welcome to the Core Fantasy Engine!", COLOR_GOLD),
             ("You are on the shores of a vast island.", COLOR_WHITE),
@@ -109,6 +200,7 @@ class Game:
             self.game_map = new_map
             self.player.x, self.player.y = player_start
             self.all_entities = [self.player] + entities
+            self.index_entity_positions()
             self.places = sub_places
             self.map_width, self.map_height = map_width, map_height
             self.add_message(f"You enter {place.name}.", COLOR_GATEWAY)
@@ -116,6 +208,7 @@ class Game:
             self.game_map = place.generated_map
             self.player.x, self.player.y = place.player_start_pos
             self.all_entities = [self.player]
+            self.index_entity_positions()
             self.places = []
             self.map_width, self.map_height = self.game_map.shape
             self.add_message(f"You return to {place.name}.", COLOR_GATEWAY)
@@ -129,11 +222,19 @@ class Game:
         self.game_map = previous_state["map"]
         self.player.x, self.player.y = previous_state["player_pos"]
         self.all_entities = previous_state["entities"]
+        self.index_entity_positions()
         self.places = previous_state["places"]
         self.map_width = previous_state["width"]
         self.map_height = previous_state["height"]
         self.add_message("You return to the wilderness.", COLOR_GATEWAY)
 
+    def index_entity_positions(self):
+        """Rebuilds the (x, y) -> entities lookup for everything on the map except the player."""
+        self.entity_positions = {}
+        for entity in self.all_entities:
+            if entity is not self.player:
+                self.entity_positions.setdefault((entity.x, entity.y), []).append(entity)
+
     def add_message(self, msg, color=COLOR_WHITE):
         if msg:
             self.message_log.append((msg, color))
@@ -222,55 +323,29 @@ class Game:
 
     def calculate_spell_targeting(self, spell):
         """Calculate valid targeting tiles for the spell."""
-        self.spell_range_tiles = []
-        self.spell_area_tiles = []
-        
-        # Calculate range (convert feet to tiles, roughly 5 feet per tile)
-        spell_range = spell.range // 5 if spell.range else 1
-        if spell.target_type == "self":
-            spell_range = 0
-        elif spell.target_type == "touch":
-            spell_range = 1
-        
         # Calculate all tiles within range
-        for x in range(max(0, self.player.x - spell_range), 
-                      min(self.map_width, self.player.x + spell_range + 1)):
-            for y in range(max(0, self.player.y - spell_range), 
-                          min(self.map_height, self.player.y + spell_range + 1)):
-                distance = math.sqrt((x - self.player.x)**2 + (y - self.player.y)**2)
-                if distance <= spell_range:
-                    self.spell_range_tiles.append((x, y))
+        self.spell_range_tiles = tiles_in_radius(self.player.x, self.player.y, spell.tile_range, self.map_width, self.map_height)
         
         # Calculate area of effect around target cursor
         self.update_spell_area()
 
     def update_spell_area(self):
         """Update area of effect tiles around the target cursor."""
-        self.spell_area_tiles = []
-        
-        if not self.targeting_spell:
+        self.spell_area_stale = False
+        spell = self.targeting_spell
+        if not spell or spell.target_type != "area":
+            self.spell_area_tiles = set()
             return
         
-        # Area of effect radius (simplified)
-        if self.targeting_spell.target_type == "area":
-            if self.targeting_spell.name == "Fireball":
-                radius = 2  # 20 foot radius = roughly 4 tiles diameter
-            else:
-                radius = 1  # Default small area
-                
-            cx, cy = self.target_cursor
-            for x in range(max(0, cx - radius), min(self.map_width, cx + radius + 1)):
-                for y in range(max(0, cy - radius), min(self.map_height, cy + radius + 1)):
-                    distance = math.sqrt((x - cx)**2 + (y - cy)**2)
-                    if distance <= radius:
-                        self.spell_area_tiles.append((x, y))
+        cx, cy = self.target_cursor
+        self.spell_area_tiles = tiles_in_radius(cx, cy, spell.area_radius, self.map_width, self.map_height)
 
     def end_spell_targeting(self):
         """End targeting mode."""
         self.targeting_mode = False
         self.targeting_spell = None
-        self.spell_range_tiles = []
-        self.spell_area_tiles = []
+        self.spell_range_tiles = set()
+        self.spell_area_tiles = set()
 
     def cast_targeted_spell(self):
         """Cast the currently targeted spell."""
@@ -281,10 +356,9 @@ class Game:
         target = None
         
         # Find target at cursor position
-        for entity in self.all_entities:
-            if entity.x == self.target_cursor[0] and entity.y == self.target_cursor[1] and entity != self.player:
-                target = entity
-                break
+        entities_at_cursor = self.entity_positions.get(self.target_cursor)
+        if entities_at_cursor:
+            target = entities_at_cursor[0]
         
         # Cast the spell
         if spell.target_type == "self":
@@ -307,7 +381,8 @@ class Game:
 
     def draw_ui(self):
         # Right Panel
-        draw_tabs(self.screen, self.right_panel_tabs_rect, self.panel_tabs, self.active_panel, self.font, self.input_focus == 'panel')
+        self.draw_cached('tabs', self.tabs_area, (self.active_panel, self.input_focus == 'panel'),
+            lambda: draw_tabs(self.screen, self.right_panel_tabs_rect, self.panel_tabs, self.active_panel, self.font, self.input_focus == 'panel'))
         draw_panel(self.screen, self.right_panel_rect, border_color=COLOR_WHITE)
         
         if self.active_panel == CHARACTER_SHEET_ICON:
@@ -324,7 +399,9 @@ class Game:
             draw_quests_panel(self.screen, self.right_panel_rect, self.player, self.quest_selected_index, self.font)
 
         # Log Panel
-        draw_log_panel(self.screen, self.log_rect, self.message_log, self.log_scroll_offset, self.font, self.input_focus == 'log')
+        # The log is only ever appended to or replaced, so the list and its length identify its contents
+        self.draw_cached('log', self.log_area, (self.message_log, len(self.message_log), self.log_scroll_offset, self.input_focus == 'log'),
+            lambda: draw_log_panel(self.screen, self.log_rect, self.message_log, self.log_scroll_offset, self.font, self.input_focus == 'log'))
         
         # Game World Border
         if self.targeting_mode:
@@ -335,68 +412,108 @@ class Game:
             border_color = COLOR_WHITE
         pygame.draw.rect(self.screen, border_color, self.game_rect, 2)
 
+    def draw_cached(self, name, area, state, draw_func):
+        """Draws a UI region via draw_func, or re-blits the last drawing if its state is unchanged."""
+        cached = self.ui_cache.get(name)
+        if cached and cached[0] == state:
+            self.screen.blit(cached[1], area)
+            return
+        draw_func()
+        self.ui_cache[name] = (state, self.screen.subsurface(area).copy())
+
     def draw_game_world(self):
         self.game_surface.fill(COLOR_BLACK)
-        cam_x = self.player.x - (self.game_rect.width // TILE_WIDTH // 2)
-        cam_y = self.player.y - (self.game_rect.height // TILE_HEIGHT // 2)
-
-        # Draw terrain
-        for y in range(self.game_rect.height // TILE_HEIGHT):
-            for x in range(self.game_rect.width // TILE_WIDTH):
-                map_x, map_y = cam_x + x, cam_y + y
-                if 0 <= map_x < self.map_width and 0 <= map_y < self.map_height:
-                    tile = self.game_map[map_x, map_y]
-                    
-                    pygame.draw.rect(self.game_surface, tile.color, (x * TILE_WIDTH, y * TILE_HEIGHT, TILE_WIDTH, TILE_HEIGHT))
-                    
-                    if tile.char != ' ':
-                        glyph_color = tile.glyph_color if tile.glyph_color else COLOR_WHITE
-                        if tile.is_gateway_to or tile.is_exit:
-                            glyph_color = COLOR_GATEWAY
-                        draw_text(self.game_surface, tile.char, x * TILE_WIDTH, y * TILE_HEIGHT, self.font, color=glyph_color)
+        cols = self.game_rect.width // TILE_WIDTH
+        rows = self.game_rect.height // TILE_HEIGHT
+        cam_x = self.player.x - (cols // 2)
+        cam_y = self.player.y - (rows // 2)
+
+        # Draw terrain: copy the visible part of the pre-rendered map
+        if self.terrain_map is not self.game_map:
+            self.render_terrain()
+        x0, x1 = max(0, -cam_x), min(cols, self.map_width - cam_x)
+        y0, y1 = max(0, -cam_y), min(rows, self.map_height - cam_y)
+        if x0 < x1 and y0 < y1:
+            visible = pygame.Rect((cam_x + x0) * TILE_WIDTH, (cam_y + y0) * TILE_HEIGHT, (x1 - x0) * TILE_WIDTH, (y1 - y0) * TILE_HEIGHT)
+            self.game_surface.blit(self.terrain_surface, (x0 * TILE_WIDTH, y0 * TILE_HEIGHT), visible)
 
         # Draw spell targeting overlays
         if self.targeting_mode:
             # Draw range indicators (red)
             for range_x, range_y in self.spell_range_tiles:
-                if 0 <= range_x - cam_x < (self.game_rect.width // TILE_WIDTH) and \
-                   0 <= range_y - cam_y < (self.game_rect.height // TILE_HEIGHT):
+                if 0 <= range_x - cam_x < cols and \
+                   0 <= range_y - cam_y < rows:
                     screen_x = (range_x - cam_x) * TILE_WIDTH
                     screen_y = (range_y - cam_y) * TILE_HEIGHT
-                    draw_text(self.game_surface, "\uf0489", screen_x, screen_y, self.font, color=(240, 72, 137))  # Red glyph
+                    self.draw_glyph("\uf0489", screen_x, screen_y, (240, 72, 137))  # Red glyph
             
             # Draw area of effect (yellow)
             for area_x, area_y in self.spell_area_tiles:
-                if 0 <= area_x - cam_x < (self.game_rect.width // TILE_WIDTH) and \
-                   0 <= area_y - cam_y < (self.game_rect.height // TILE_HEIGHT):
+                if 0 <= area_x - cam_x < cols and \
+                   0 <= area_y - cam_y < rows:
                     screen_x = (area_x - cam_x) * TILE_WIDTH
                     screen_y = (area_y - cam_y) * TILE_HEIGHT
-                    draw_text(self.game_surface, "\uf0489", screen_x, screen_y, self.font, color=COLOR_GOLD)  # Yellow glyph
+                    self.draw_glyph("\uf0489", screen_x, screen_y, COLOR_GOLD)  # Yellow glyph
             
             # Draw targeting cursor (blue)
             cursor_x, cursor_y = self.target_cursor
-            if 0 <= cursor_x - cam_x < (self.game_rect.width // TILE_WIDTH) and \
-               0 <= cursor_y - cam_y < (self.game_rect.height // TILE_HEIGHT):
+            if 0 <= cursor_x - cam_x < cols and \
+               0 <= cursor_y - cam_y < rows:
                 screen_x = (cursor_x - cam_x) * TILE_WIDTH
                 screen_y = (cursor_y - cam_y) * TILE_HEIGHT
-                draw_text(self.game_surface, "\ue26d", screen_x, screen_y, self.font, color=COLOR_BLUE)  # Blue cursor
+                self.draw_glyph("\ue26d", screen_x, screen_y, COLOR_BLUE)  # Blue cursor
 
         # Draw entities
-        for entity in sorted(self.all_entities, key=lambda e: isinstance(e, NPC)):
+        creatures, npcs = [], []
+        for entity in self.all_entities:
+            (npcs if isinstance(entity, NPC) else creatures).append(entity)
+        for entity in creatures + npcs: # NPCs last so they stay on top
              if (hasattr(entity, 'hp') and entity.hp > 0) or not hasattr(entity, 'hp'):
-                if 0 <= entity.x - cam_x < (self.game_rect.width // TILE_WIDTH) and \
-                   0 <= entity.y - cam_y < (self.game_rect.height // TILE_HEIGHT):
-                    draw_text(self.game_surface, entity.char, (entity.x - cam_x) * TILE_WIDTH, (entity.y - cam_y) * TILE_HEIGHT, self.font, color=entity.color)
+                if 0 <= entity.x - cam_x < cols and \
+                   0 <= entity.y - cam_y < rows:
+                    self.draw_glyph(entity.char, (entity.x - cam_x) * TILE_WIDTH, (entity.y - cam_y) * TILE_HEIGHT, entity.color)
 
         # Draw look cursor (only when not targeting)
         if self.game_state == 'looking' and not self.targeting_mode:
             cursor_x, cursor_y = self.look_cursor
-            if 0 <= cursor_x - cam_x < (self.game_rect.width // TILE_WIDTH) and \
-               0 <= cursor_y - cam_y < (self.game_rect.height // TILE_HEIGHT):
+            if 0 <= cursor_x - cam_x < cols and \
+               0 <= cursor_y - cam_y < rows:
                 screen_x = (cursor_x - cam_x) * TILE_WIDTH
                 screen_y = (cursor_y - cam_y) * TILE_HEIGHT
                 pygame.draw.rect(self.game_surface, COLOR_SELECTED, (screen_x, screen_y, TILE_WIDTH, TILE_HEIGHT), 2)
 
+    def get_glyph(self, char, color):
+        """Returns the rendered glyph surface, rendering each (char, color) pair only once."""
+        key = (char, color)
+        glyph = self.glyph_cache.get(key)
+        if glyph is None:
+            glyph = self.glyph_cache[key] = self.font.render(char, True, color)
+        return glyph
+
+    def draw_glyph(self, char, x, y, color):
+        """Blits a single map glyph onto the game world surface."""
+        self.game_surface.blit(self.get_glyph(char, color), (x, y))
+
+    def render_terrain(self):
+        """Pre-renders every tile of the current map onto one surface."""
+        self.terrain_surface = pygame.Surface((self.map_width * TILE_WIDTH, self.map_height * TILE_HEIGHT))
+        self.terrain_map = self.game_map
+        for y in range(self.map_height):
+            for x in range(self.map_width):
+                self.render_terrain_tile(x, y)
+
+    def render_terrain_tile(self, x, y):
+        """Redraws one map tile on the pre-rendered terrain surface."""
+        tile = self.game_map[x, y]
+        pixel_x, pixel_y = x * TILE_WIDTH, y * TILE_HEIGHT
+        pygame.draw.rect(self.terrain_surface, tile.color, (pixel_x, pixel_y, TILE_WIDTH, TILE_HEIGHT))
+        
+        if tile.char != ' ':
+            glyph_color = tile.glyph_color if tile.glyph_color else COLOR_WHITE
+            if tile.is_gateway_to or tile.is_exit:
+                glyph_color = COLOR_GATEWAY
+            self.terrain_surface.blit(self.get_glyph(tile.char, glyph_color), (pixel_x, pixel_y))
+
     def draw(self):
         self.screen.fill(COLOR_BLACK)
         self.draw_game_world()
@@ -414,16 +531,15 @@ class Game:
             draw_level_up_window(self.screen, level_up_rect, self.font)
 
         if self.game_state == 'show_item_options':
-            if self.player.display_inventory:
-                item = self.player.display_inventory[self.inventory_selected_index]
-                options = ["Use", "Drop"]
+            inventory = self.player.display_inventory
+            if inventory:
+                item = inventory[self.inventory_selected_index]
                 item_options_rect = pygame.Rect(0,0, 250, 200)
                 item_options_rect.center = self.screen.get_rect().center
-                draw_item_options_window(self.screen, item_options_rect, item, options, self.item_options_selected_index, self.font)
+                draw_item_options_window(self.screen, item_options_rect, item, ITEM_OPTIONS, self.item_options_selected_index, self.font)
 
         if self.game_state == 'select_item_to_equip':
-            slot = list(self.player.equipment.keys())[self.equipment_selected_index]
-            items = [item for item in self.player.inventory if hasattr(item, 'equip_slot') and item.equip_slot == slot]
+            items = self.equip_candidates()
             
             height = 150 + (len(items) * 60)
             equip_rect = pygame.Rect(0,0, 350, height)
@@ -437,149 +553,156 @@ class Game:
 
         pygame.display.flip()
 
-    def handle_input(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
+    def handle_events(self, events):
+        """Handles one frame's events, as returned by a single pygame.event.get() call."""
+        for event in events:
             if event.type == pygame.KEYDOWN:
-                # Handle targeting mode first
-                if self.targeting_mode:
-                    self.handle_targeting_input(event.key)
-                    return
-                
-                # Handle pause menu
-                if self.game_state == 'pause_menu':
-                    self.handle_pause_menu_input(event.key)
-                    return
-                
-                # Handle other pop-up states
-                if self.game_state == 'level_up':
-                    if event.key == pygame.K_RETURN: 
-                        self.game_state = 'playing'
-                    return
-                
-                if self.game_state == 'show_quest_details':
-                    if event.key == pygame.K_ESCAPE:
-                        self.game_state = 'playing'
-                        self.quest_details_window = None
-                    return
-                
-                if self.game_state == 'show_item_options':
-                    self.handle_item_options_input(event.key)
-                    return
-                
-                if self.game_state == 'select_item_to_equip':
-                    self.handle_equip_selection_input(event.key)
-                    return
-
-                # Main game escape handling
-                if event.key == pygame.K_ESCAPE:
-                    if self.game_state == 'looking':
-                        self.game_state = 'playing'
-                        self.add_message("You stop looking around.")
-                    elif self.game_state == 'playing':
-                        self.game_state = 'pause_menu'
-                        self.pause_menu_selected_index = 0
-                
-                if event.key == pygame.K_TAB:
-                    if self.input_focus == 'world': 
-                        self.input_focus = 'log'
-                    elif self.input_focus == 'log': 
-                        self.input_focus = 'panel'
-                    else: 
-                        self.input_focus = 'world'
-                
-                if self.input_focus == 'log':
-                    if event.key == pygame.K_UP:
-                        self.log_scroll_offset = min(self.log_scroll_offset + 1, len(self.message_log) -1)
-                    if event.key == pygame.K_DOWN:
-                        self.log_scroll_offset = max(self.log_scroll_offset - 1, 0)
-                
-                elif self.input_focus == 'panel':
-                    self.handle_panel_input(event.key)
-
-                elif self.input_focus == 'world':
-                    if self.game_state == 'looking':
-                        if event.key == pygame.K_RETURN:
-                            self.handle_interaction()
-
-                    if event.key == pygame.K_l:
-                        self.game_state = 'looking' if self.game_state == 'playing' else 'playing'
-                        if self.game_state == 'looking':
-                            self.look_cursor = (self.player.x, self.player.y)
-                            self.add_message("You look around. (ENTER to interact)", COLOR_SELECTED)
-                        else:
-                            self.add_message("You stop looking around.")
-                    
-                    # CFE Rest command
-                    if event.key == pygame.K_r:
-                        rest_msg = self.player.rest()
-                        self.add_message(rest_msg, COLOR_BLUE)
+                self.handle_keydown(event.key)
+            elif event.type == pygame.QUIT:
+                self.running = False
+        
+        # Rebuild the area of effect once for all cursor steps in this batch
+        if self.spell_area_stale:
+            self.update_spell_area()
 
-    def handle_targeting_input(self, key):
-        """Handle input during spell targeting mode."""
-        if key == pygame.K_ESCAPE:
-            self.end_spell_targeting()
-            self.add_message("Spell targeting cancelled.", COLOR_GREY)
+    def handle_keydown(self, key):
+        """Routes a key press to the handler for the current mode."""
+        # Handle targeting mode first
+        if self.targeting_mode:
+            self.handle_targeting_input(key)
             return
         
-        if key == pygame.K_RETURN:
-            # Check if target is in valid range
-            if self.target_cursor in self.spell_range_tiles:
-                self.cast_targeted_spell()
-            else:
-                self.add_message("Target is out of range!", COLOR_RED)
+        # Pop-up states take all input; anything else is the main view
+        handler = self.state_handlers.get(self.game_state, self.handle_playing_input)
+        handler(key)
+
+    def handle_level_up_input(self, key):
+        """Dismisses the level up window."""
+        if key == pygame.K_RETURN: 
+            self.game_state = 'playing'
+
+    def handle_quest_details_input(self, key):
+        """Closes the quest details window."""
+        if key == pygame.K_ESCAPE:
+            self.game_state = 'playing'
+            self.quest_details_window = None
+
+    def handle_playing_input(self, key):
+        """Handles keys for the main view: global keys first, then the focused area."""
+        action = self.playing_keys.get(key)
+        if action:
+            action()
+        
+        if self.input_focus == 'panel':
+            self.handle_panel_input(key)
+        else:
+            action = self.focus_keys[self.input_focus].get(key)
+            if action:
+                action()
+
+    def handle_escape(self):
+        """Leaves look mode, or opens the pause menu while playing."""
+        if self.game_state == 'looking':
+            self.game_state = 'playing'
+            self.add_message("You stop looking around.")
+        elif self.game_state == 'playing':
+            self.game_state = 'pause_menu'
+            self.pause_menu_selected_index = 0
+
+    def cycle_input_focus(self):
+        """Cycles input focus between the world, the log and the side panel."""
+        if self.input_focus == 'world': 
+            self.input_focus = 'log'
+        elif self.input_focus == 'log': 
+            self.input_focus = 'panel'
+        else: 
+            self.input_focus = 'world'
+
+    def scroll_log_up(self):
+        self.log_scroll_offset = min(self.log_scroll_offset + 1, len(self.message_log) -1)
+
+    def scroll_log_down(self):
+        self.log_scroll_offset = max(self.log_scroll_offset - 1, 0)
+
+    def interact_at_look_cursor(self):
+        if self.game_state == 'looking':
+            self.handle_interaction()
+
+    def toggle_look_mode(self):
+        self.game_state = 'looking' if self.game_state == 'playing' else 'playing'
+        if self.game_state == 'looking':
+            self.look_cursor = (self.player.x, self.player.y)
+            self.add_message("You look around. (ENTER to interact)", COLOR_SELECTED)
+        else:
+            self.add_message("You stop looking around.")
+
+    def rest_player(self):
+        """CFE Rest command."""
+        rest_msg = self.player.rest()
+        self.add_message(rest_msg, COLOR_BLUE)
+
+    def handle_targeting_input(self, key):
+        """Handle input during spell targeting mode."""
+        action = self.targeting_keys.get(key)
+        if action:
+            action()
             return
         
         # Move targeting cursor
-        dx, dy = 0, 0
-        if key == pygame.K_UP: dy = -1
-        elif key == pygame.K_DOWN: dy = 1
-        elif key == pygame.K_LEFT: dx = -1
-        elif key == pygame.K_RIGHT: dx = 1
-        
+        dx, dy = ARROW_DELTAS.get(key, (0, 0))
         if dx != 0 or dy != 0:
-            new_x = max(0, min(self.map_width - 1, self.target_cursor[0] + dx))
-            new_y = max(0, min(self.map_height - 1, self.target_cursor[1] + dy))
-            self.target_cursor = (new_x, new_y)
-            
-            # Update area of effect
-            self.update_spell_area()
+            new_x, new_y = self.target_cursor[0] + dx, self.target_cursor[1] + dy
+            if 0 <= new_x < self.map_width and 0 <= new_y < self.map_height:
+                self.target_cursor = (new_x, new_y)
+                self.spell_area_stale = True
+
+    def cancel_spell_targeting(self):
+        self.end_spell_targeting()
+        self.add_message("Spell targeting cancelled.", COLOR_GREY)
+
+    def confirm_spell_target(self):
+        # Check if target is in valid range
+        if self.target_cursor in self.spell_range_tiles:
+            self.cast_targeted_spell()
+        else:
+            self.add_message("Target is out of range!", COLOR_RED)
 
     def handle_pause_menu_input(self, key):
         """Handles input for the pause menu."""
-        pause_options = ["Resume", "Save Game", "Load Game", "Quit to Title"]
-        
-        if key == pygame.K_UP:
-            self.pause_menu_selected_index = max(0, self.pause_menu_selected_index - 1)
-        elif key == pygame.K_DOWN:
-            self.pause_menu_selected_index = min(len(pause_options) - 1, self.pause_menu_selected_index + 1)
-        elif key == pygame.K_ESCAPE:
-            self.game_state = 'playing'
-        elif key == pygame.K_RETURN:
-            selected_option = pause_options[self.pause_menu_selected_index]
-            
-            if selected_option == "Resume":
-                self.game_state = 'playing'
-            elif selected_option == "Save Game":
-                message = self.save_game()
-                self.add_message(message, COLOR_GOLD)
-                self.game_state = 'playing'
-            elif selected_option == "Load Game":
-                message = self.load_game()
-                self.add_message(message, COLOR_GOLD)
-                self.game_state = 'playing'
-            elif selected_option == "Quit to Title":
-                self.running = False
+        action = self.pause_menu_keys.get(key)
+        if action:
+            action()
+
+    def pause_menu_previous(self):
+        self.pause_menu_selected_index = max(0, self.pause_menu_selected_index - 1)
+
+    def pause_menu_next(self):
+        self.pause_menu_selected_index = min(len(self.pause_menu_actions) - 1, self.pause_menu_selected_index + 1)
+
+    def select_pause_option(self):
+        self.pause_menu_actions[self.pause_menu_selected_index]()
+
+    def resume_game(self):
+        self.game_state = 'playing'
+
+    def save_from_menu(self):
+        message = self.save_game()
+        self.add_message(message, COLOR_GOLD)
+        self.game_state = 'playing'
+
+    def load_from_menu(self):
+        message = self.load_game()
+        self.add_message(message, COLOR_GOLD)
+        self.game_state = 'playing'
+
+    def quit_to_title(self):
+        self.running = False
 
     def handle_panel_input(self, key):
         """Handles input when the side panel is focused."""
-        current_index = self.panel_tabs.index(self.active_panel)
-        if key == pygame.K_RIGHT:
-            new_index = (current_index + 1) % len(self.panel_tabs)
-            self.active_panel = self.panel_tabs[new_index]
-        if key == pygame.K_LEFT:
-            new_index = (current_index - 1) % len(self.panel_tabs)
+        step = self.panel_tab_steps.get(key)
+        if step:
+            new_index = (self.panel_tab_index[self.active_panel] + step) % len(self.panel_tabs)
             self.active_panel = self.panel_tabs[new_index]
         
         if self.active_panel == INVENTORY_ICON:
@@ -597,7 +720,7 @@ class Game:
             if key == pygame.K_UP:
                 self.equipment_selected_index = max(0, self.equipment_selected_index - 1)
             if key == pygame.K_DOWN:
-                self.equipment_selected_index = min(len(self.player.equipment) - 1, self.equipment_selected_index + 1)
+                self.equipment_selected_index = min(len(Player.EQUIPMENT_SLOTS) - 1, self.equipment_selected_index + 1)
             if key == pygame.K_RETURN:
                  self.game_state = 'select_item_to_equip'
                  self.equip_selection_index = 0
@@ -624,7 +747,7 @@ class Game:
                         self.cast_spell_from_panel(spell_name)
         
         elif self.active_panel == QUESTS_ICON:
-            active_quests = sorted(self.player.quest_log.active_quests.keys())
+            active_quests = self.player.quest_log.sorted_active_names()
             if active_quests:
                 if key == pygame.K_UP:
                     self.quest_selected_index = max(0, self.quest_selected_index - 1)
@@ -667,48 +790,60 @@ class Game:
         if not self.player.display_inventory:
             self.game_state = 'playing'
             return
-            
-        item_to_use = self.player.display_inventory[self.inventory_selected_index]
-        options = ["Use", "Drop"]
         
-        if key == pygame.K_UP:
-            self.item_options_selected_index = max(0, self.item_options_selected_index - 1)
-        if key == pygame.K_DOWN:
-            self.item_options_selected_index = min(len(options) - 1, self.item_options_selected_index + 1)
-        if key == pygame.K_ESCAPE:
-            self.game_state = 'playing'
-        if key == pygame.K_RETURN:
-            selected_option = options[self.item_options_selected_index]
-            if selected_option == "Use":
-                self.add_message(self.player.use_item(item_to_use))
-            elif selected_option == "Drop":
-                self.player.inventory.remove(item_to_use)
-                self.add_message(f"You drop the {item_to_use.name}.")
-            self.game_state = 'playing'
+        action = self.item_option_keys.get(key)
+        if action:
+            action()
+
+    def item_option_previous(self):
+        self.item_options_selected_index = max(0, self.item_options_selected_index - 1)
+
+    def item_option_next(self):
+        self.item_options_selected_index = min(len(self.item_option_actions) - 1, self.item_options_selected_index + 1)
+
+    def select_item_option(self):
+        item = self.player.display_inventory[self.inventory_selected_index]
+        self.item_option_actions[self.item_options_selected_index](item)
+        self.game_state = 'playing'
+
+    def use_selected_item(self, item):
+        self.add_message(self.player.use_item(item))
+
+    def drop_selected_item(self, item):
+        self.player.inventory.remove(item)
+        self.add_message(f"You drop the {item.name}.")
 
     def handle_equip_selection_input(self, key):
         """Handles input for the equipment selection window."""
-        slot = list(self.player.equipment.keys())[self.equipment_selected_index]
-        items = [item for item in self.player.inventory if hasattr(item, 'equip_slot') and item.equip_slot == slot]
+        action = self.equip_selection_keys.get(key)
+        if action:
+            action()
 
-        if key == pygame.K_UP:
-            self.equip_selection_index = max(0, self.equip_selection_index - 1)
-        if key == pygame.K_DOWN:
-            self.equip_selection_index = min(len(items) - 1, self.equip_selection_index + 1)
-        if key == pygame.K_ESCAPE:
-            self.game_state = 'playing'
-        if key == pygame.K_RETURN and items:
-            item_to_equip = items[self.equip_selection_index]
-            self.add_message(self.player.equip(item_to_equip))
+    def equip_candidates(self):
+        """Inventory items that fit the selected equipment slot."""
+        slot = Player.EQUIPMENT_SLOTS[self.equipment_selected_index]
+        return [item for item in self.player.inventory if hasattr(item, 'equip_slot') and item.equip_slot == slot]
+
+    def equip_selection_previous(self):
+        self.equip_selection_index = max(0, self.equip_selection_index - 1)
+
+    def equip_selection_next(self):
+        self.equip_selection_index = min(len(self.equip_candidates()) - 1, self.equip_selection_index + 1)
+
+    def equip_selected_item(self):
+        items = self.equip_candidates()
+        if items:
+            self.add_message(self.player.equip(items[self.equip_selection_index]))
             self.game_state = 'playing'
 
     def handle_interaction(self):
         x, y = self.look_cursor
-        if math.sqrt((x - self.player.x)**2 + (y - self.player.y)**2) > 1.5:
+        dx, dy = x - self.player.x, y - self.player.y
+        if dx * dx + dy * dy > INTERACT_RANGE_SQ:
             self.add_message("You are too far away.", COLOR_GREY)
             return
 
-        target_npc = next((e for e in self.all_entities if isinstance(e, NPC) and e.x == x and e.y == y), None)
+        target_npc = next((e for e in self.entity_positions.get((x, y), ()) if isinstance(e, NPC)), None)
         if target_npc:
             self.add_message(f"{target_npc.name}: '{target_npc.dialogue}'", COLOR_NPC)
             if target_npc.quest:
@@ -721,8 +856,7 @@ class Game:
         tile = self.game_map[x, y]
         if tile.is_interactive:
             if tile.name == "a chest":
-                from items import create_random_treasure
-                treasure_item, value = create_random_treasure((25, 100))
+                treasure_item, value = create_random_treasure(CHEST_TREASURE_RANGE)
                 self.player.inventory.append(treasure_item)
                 self.player.gold += value
                 
@@ -734,6 +868,8 @@ class Game:
                     self.game_state = 'level_up'
                 
                 self.game_map[x, y] = Tile(False, ' ', tile.color, "an empty chest")
+                if self.terrain_map is self.game_map:
+                    self.render_terrain_tile(x, y)
             return
 
         self.add_message("There is nothing to interact with there.", COLOR_GREY)
@@ -744,12 +880,7 @@ class Game:
             
         current_time = pygame.time.get_ticks()
         if current_time - self.last_move_time > self.move_delay:
-            keys = pygame.key.get_pressed()
-            dx, dy = 0, 0
-            if keys[pygame.K_UP]: dy = -1
-            elif keys[pygame.K_DOWN]: dy = 1
-            elif keys[pygame.K_LEFT]: dx = -1
-            elif keys[pygame.K_RIGHT]: dx = 1
+            dx, dy = held_arrow_delta()
             if dx != 0 or dy != 0:
                 self.player_move_or_attack(dx, dy)
                 self.monster_turns()
@@ -760,12 +891,7 @@ class Game:
             return
         current_time = pygame.time.get_ticks()
         if current_time - self.last_move_time > self.move_delay:
-            keys = pygame.key.get_pressed()
-            dx, dy = 0, 0
-            if keys[pygame.K_UP]: dy = -1
-            elif keys[pygame.K_DOWN]: dy = 1
-            elif keys[pygame.K_LEFT]: dx = -1
-            elif keys[pygame.K_RIGHT]: dx = 1
+            dx, dy = held_arrow_delta()
             if dx != 0 or dy != 0:
                 new_x, new_y = self.look_cursor[0] + dx, self.look_cursor[1] + dy
                 if 0 <= new_x < self.map_width and 0 <= new_y < self.map_height:
@@ -774,11 +900,12 @@ class Game:
                     self.last_move_time = current_time
 
     def get_tile_info(self, x, y):
-        for entity in self.all_entities:
-            if entity.x == x and entity.y == y and entity is not self.player:
-                hp_info = f" ({entity.hp}/{getattr(entity, 'max_hp', entity.hp)} HP)" if hasattr(entity, 'hp') else ""
-                self.add_message(f"You see {entity.name}{hp_info}.", entity.color)
-                return
+        entities = self.entity_positions.get((x, y))
+        if entities:
+            entity = entities[0]
+            hp_info = f" ({entity.hp}/{entity.max_hp} HP)" if hasattr(entity, 'hp') else ""
+            self.add_message(f"You see {entity.name}{hp_info}.", entity.color)
+            return
         tile = self.game_map[x, y]
         self.add_message(f"You see {tile.name}.", tile.color)
 
@@ -829,12 +956,15 @@ class Game:
                     self.add_message("You have died!", COLOR_RED)
                     self.running = False
                     break
+        
+        self.index_entity_positions()
 
     def run(self):
         """Main game loop."""
         while self.running:
             self.clock.tick(FPS)
-            self.handle_input()
+            self.handle_events(pygame.event.get((pygame.KEYDOWN, pygame.QUIT)))
+            pygame.event.clear(pump=False)  # Mouse/window events have no handlers
             self.handle_continuous_movement()
             self.handle_look_cursor()
             self.draw()
\ No newline at end of file
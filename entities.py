@@ -8,6 +8,8 @@ from spells import CORE_SPELLS, STARTING_MAGE_SPELLS, get_spell_by_name
 
 def roll_dice(num_dice, sides):
     """Rolls a number of dice with a given number of sides."""
+    if num_dice == 1:
+        return random.randint(1, sides)
     return sum(random.randint(1, sides) for _ in range(num_dice))
 
 def calculate_modifier(score):
@@ -181,15 +183,16 @@ class Combatant(GameObject):
     def take_turn(self, target, game_map, all_combatants):
         """Default hostile AI: move towards player and attack within a certain range."""
         dx, dy = target.x - self.x, target.y - self.y
-        distance = math.sqrt(dx**2 + dy**2)
+        distance_sq = dx * dx + dy * dy
 
-        if distance > 10: return None 
+        if distance_sq > 100: return None # More than 10 tiles away
 
-        if distance < 1.5:
+        if distance_sq <= 2: # Adjacent, diagonals included
             return self.attack(target)
         else:
-            move_dx = int(round(dx / distance)) if distance > 0 else 0
-            move_dy = int(round(dy / distance)) if distance > 0 else 0
+            distance = math.hypot(dx, dy)
+            move_dx = int(round(dx / distance))
+            move_dy = int(round(dy / distance))
             new_x, new_y = self.x + move_dx, self.y + move_dy
 
             if 0 <= new_x < game_map.shape[0] and 0 <= new_y < game_map.shape[1]:
@@ -202,6 +205,8 @@ class Combatant(GameObject):
 
 class Player(Combatant):
     """The player character with CFE archetype abilities."""
+    EQUIPMENT_SLOTS = ("Weapon", "Armor", "Shield", "Ring")
+
     def __init__(self, archetype, abilities):
         super().__init__(0, 0, '@', COLOR_PLAYER, 'Player')
         self.abilities = abilities
@@ -222,16 +227,11 @@ class Player(Combatant):
         self.base_attack_bonus = ARCHETYPES[archetype]["attack_bonus_start"]
         
         # Equipment slots
-        self.equipment = {
-            "Weapon": None,
-            "Armor": None,
-            "Shield": None,
-            "Ring": None
-        }
+        self.equipment = dict.fromkeys(self.EQUIPMENT_SLOTS)
         
         # Starting equipment based on archetype
-        starting_items = STARTING_ITEMS.get(archetype, [])
-        self.inventory = starting_items.copy()
+        starting_items = STARTING_ITEMS.get(archetype, ())
+        self.inventory = list(starting_items)
         
         # Auto-equip appropriate starting items
         for item in starting_items:
@@ -1,33 +1,47 @@
 # items.py - CFE Equipment System
 from config import WEAPON_CATEGORIES, ARMOR_CATEGORIES
+from types import MappingProxyType
 import random
 
+# Shared read-only defaults for items without bonuses or category properties
+_EMPTY_BONUSES = MappingProxyType({})
+_NO_PROPERTIES = ()
+
 def roll_dice(num_dice, sides):
     """Rolls a number of dice with a given number of sides."""
+    if num_dice == 1:
+        return random.randint(1, sides)
     return sum(random.randint(1, sides) for _ in range(num_dice))
 
 class Item:
     """Base class for all items using CFE category system."""
+    # damage_dice/damage_sides and ac_bonus stay unset on armor and weapons
+    # respectively, so hasattr() still tells the two apart.
+    __slots__ = (
+        'name', 'category', 'description', 'item_type', 'equip_slot', 'bonuses', 'healing',
+        'damage_dice', 'damage_sides', 'ac_bonus', 'cost', 'properties'
+    )
+
     def __init__(self, name, category, description="", item_type='misc', equip_slot=None, bonuses=None, healing=None):
         self.name = name
         self.category = category
         self.description = description
         self.item_type = item_type
         self.equip_slot = equip_slot
-        self.bonuses = bonuses if bonuses else {}
+        self.bonuses = bonuses if bonuses else _EMPTY_BONUSES
         self.healing = healing
         
         # Load properties from category if it's a weapon or armor
-        if category in WEAPON_CATEGORIES:
-            weapon_data = WEAPON_CATEGORIES[category]
+        weapon_data = WEAPON_CATEGORIES.get(category)
+        armor_data = ARMOR_CATEGORIES.get(category)
+        if weapon_data is not None:
             self.damage_dice = weapon_data["damage_dice"]
             self.damage_sides = weapon_data["damage_sides"]
             self.cost = weapon_data["cost"]
             self.properties = weapon_data["properties"]
             self.item_type = weapon_data["item_type"]
             self.equip_slot = weapon_data["equip_slot"]
-        elif category in ARMOR_CATEGORIES:
-            armor_data = ARMOR_CATEGORIES[category]
+        elif armor_data is not None:
             self.ac_bonus = armor_data["ac_bonus"]
             self.cost = armor_data["cost"]
             self.properties = armor_data["properties"]
@@ -40,10 +54,12 @@ class Item:
             self.damage_dice = None
             self.damage_sides = None
             self.cost = 0
-            self.properties = []
+            self.properties = _NO_PROPERTIES
 
 class MagicItem(Item):
     """Special class for magic items with enhanced properties."""
+    __slots__ = ('magic_bonus', 'is_magical', 'special_properties')
+
     def __init__(self, name, base_category, magic_bonus, description="", special_properties=None):
         super().__init__(name, base_category, description)
         self.magic_bonus = magic_bonus
@@ -51,14 +67,15 @@ class MagicItem(Item):
         self.special_properties = special_properties or []
         
         # Apply magic bonus to appropriate stats
-        if hasattr(self, 'damage_dice'):  # Weapon
+        if base_category in WEAPON_CATEGORIES:
+            self.bonuses = dict(self.bonuses)  # May be the shared _EMPTY_BONUSES
             if 'attack' not in self.bonuses:
                 self.bonuses['attack'] = 0
             if 'damage' not in self.bonuses:
                 self.bonuses['damage'] = 0
             self.bonuses['attack'] += magic_bonus
             self.bonuses['damage'] += magic_bonus
-        elif hasattr(self, 'ac_bonus'):  # Armor
+        elif base_category in ARMOR_CATEGORIES:
             self.bonuses['ac'] = self.ac_bonus + magic_bonus
 
 # --- CFE Weapon Instances ---
@@ -144,32 +161,47 @@ gems = Item("Precious Gems", None, "A collection of valuable gemstones.", item_t
 
 # --- Item Lists for Easy Access ---
 
-ALL_WEAPONS = [
+ALL_WEAPONS = (
     dagger, club, short_sword, mace, hand_axe, 
     longsword, battle_axe, greatsword, short_bow, long_bow
-]
+)
 
-ALL_ARMOR = [
+ALL_ARMOR = (
     leather_armor, studded_leather, scale_mail, chain_mail,
     splint_armor, plate_armor, wooden_shield, steel_shield
-]
+)
 
-ALL_MAGIC_ITEMS = [
+ALL_MAGIC_ITEMS = (
     iron_sword_plus_1, ring_of_protection_plus_1
-]
+)
 
-ALL_CONSUMABLES = [
+ALL_CONSUMABLES = (
     health_potion, mana_potion
-]
+)
 
-ALL_MISC_ITEMS = [
+ALL_MISC_ITEMS = (
     rope, torch, rations
-]
+)
+
+ALL_ITEMS = ALL_WEAPONS + ALL_ARMOR + ALL_MAGIC_ITEMS + ALL_CONSUMABLES + ALL_MISC_ITEMS
+ITEMS_BY_NAME = {item.name: item for item in ALL_ITEMS}
 
 STARTING_ITEMS = {
-    "Warrior": [short_sword, leather_armor, wooden_shield, health_potion, rope],
-    "Mage": [dagger, health_potion, rope, torch],
-    "Expert": [short_sword, leather_armor, short_bow, health_potion, rope]
+    "Warrior": (short_sword, leather_armor, wooden_shield, health_potion, rope),
+    "Mage": (dagger, health_potion, rope, torch),
+    "Expert": (short_sword, leather_armor, short_bow, health_potion, rope)
+}
+
+WEAPON_PROFICIENCIES = {
+    "Warrior": ALL_WEAPONS,  # Can use all weapons
+    "Mage": (dagger, club),  # Simple weapons only
+    "Expert": (dagger, club, short_sword, mace, hand_axe, short_bow, long_bow)  # Simple + ranged
+}
+
+ARMOR_PROFICIENCIES = {
+    "Warrior": ALL_ARMOR,  # Can use all armor
+    "Mage": (),  # No armor
+    "Expert": (leather_armor, studded_leather, scale_mail, chain_mail, wooden_shield, steel_shield)  # Light + medium
 }
 
 def create_random_treasure(value_range=(10, 100)):
@@ -185,20 +217,8 @@ def create_random_treasure(value_range=(10, 100)):
 
 def get_weapons_by_proficiency(archetype):
     """Returns weapons the archetype can use."""
-    if archetype == "Warrior":
-        return ALL_WEAPONS  # Can use all weapons
-    elif archetype == "Mage":
-        return [dagger, club]  # Simple weapons only
-    elif archetype == "Expert":
-        return [dagger, club, short_sword, mace, hand_axe, short_bow, long_bow]  # Simple + ranged
-    return []
+    return WEAPON_PROFICIENCIES.get(archetype, ())
 
 def get_armor_by_proficiency(archetype):
     """Returns armor the archetype can use."""
-    if archetype == "Warrior":
-        return ALL_ARMOR  # Can use all armor
-    elif archetype == "Mage":
-        return []  # No armor
-    elif archetype == "Expert":
-        return [leather_armor, studded_leather, scale_mail, chain_mail, wooden_shield, steel_shield]  # Light + medium
-    return []
\ No newline at end of file
+    return ARMOR_PROFICIENCIES.get(archetype, ())
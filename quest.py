@@ -6,17 +6,19 @@ class Quest:
         self.name = name
         self.description = description
         self.objectives = {obj: False for obj in objectives} # Objective: is_complete
+        self._remaining_objectives = len(self.objectives)
         self.is_complete = False
 
     def complete_objective(self, objective_name):
         """Marks an objective as complete."""
-        if objective_name in self.objectives:
+        if self.objectives.get(objective_name) is False:
             self.objectives[objective_name] = True
+            self._remaining_objectives -= 1
             self.check_completion()
 
     def check_completion(self):
         """Checks if all objectives are complete."""
-        if all(self.objectives.values()):
+        if self._remaining_objectives == 0:
             self.is_complete = True
 
 class QuestLog:
@@ -24,11 +26,19 @@ class QuestLog:
     def __init__(self):
         self.active_quests = {}
         self.completed_quests = {}
+        self._sorted_active_names = None # Rebuilt lazily after quests are added or completed
+
+    def sorted_active_names(self):
+        """Returns the active quest names in display order, re-sorting only after a change."""
+        if self._sorted_active_names is None:
+            self._sorted_active_names = sorted(self.active_quests)
+        return self._sorted_active_names
 
     def add_quest(self, quest):
         """Adds a new quest to the active list."""
         if quest.name not in self.active_quests and quest.name not in self.completed_quests:
             self.active_quests[quest.name] = quest
+            self._sorted_active_names = None
             return f"New Quest: {quest.name}"
         return None
 
@@ -36,6 +46,7 @@ class QuestLog:
         """Moves a quest from active to completed."""
         if quest_name in self.active_quests:
             quest = self.active_quests.pop(quest_name)
+            self._sorted_active_names = None
             quest.is_complete = True
             self.completed_quests[quest_name] = quest
             return f"Quest Complete: {quest_name}"
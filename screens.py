@@ -1,41 +1,67 @@
 # screens.py
 import pygame
 from config import *
-from ui import draw_text # draw_menu is no longer used
 from entities import Player, roll_dice
 
+MENU_EVENT_TIMEOUT = 100 # ms to sleep waiting for input before checking again
+
+def blit_text(screen, cache, text, x, y, font, color=COLOR_WHITE, center=False):
+    """Blits a line of text, rendering each (text, color) pair only once per cache."""
+    key = (text, color)
+    text_surface = cache.get(key)
+    if text_surface is None:
+        text_surface = cache[key] = font.render(text, True, color)
+    text_rect = text_surface.get_rect(top=y)
+    if center:
+        text_rect.centerx = x
+    else:
+        text_rect.left = x
+    screen.blit(text_surface, text_rect)
+
+def row_rect(screen, y, font):
+    """Returns the full-width band covered by a line of text drawn at y."""
+    return pygame.Rect(0, y, screen.get_width(), font.get_height())
+
 def title_screen(screen, font, clock):
     """Displays the title screen and handles menu navigation."""
     menu_options = ["New Game", "Quit"]
     selected_index = 0
+    text_cache = {} # Menu text never changes, so each line is rendered once
+    dirty_rects = [screen.get_rect()] # Screen areas that changed since the last display update
     
     while True:
-        screen.fill(COLOR_BLACK)
-        draw_text(screen, "ASCII Adventure RPG", screen.get_width() // 2, screen.get_height() // 4, font, center=True)
-        
-        # --- MODIFICATION: Manually draw the menu using draw_text ---
-        for i, option_text in enumerate(menu_options):
-            color = COLOR_SELECTED if i == selected_index else COLOR_WHITE
-            y_pos = screen.get_height() // 2 + i * 60
-            draw_text(screen, option_text, screen.get_width() // 2, y_pos, font, color, center=True)
+        # Only redraw after something changed; the menu is otherwise static
+        if dirty_rects:
+            screen.fill(COLOR_BLACK)
+            blit_text(screen, text_cache, "ASCII Adventure RPG", screen.get_width() // 2, screen.get_height() // 4, font, center=True)
+            
+            # --- MODIFICATION: Manually draw the menu using blit_text ---
+            for i, option_text in enumerate(menu_options):
+                color = COLOR_SELECTED if i == selected_index else COLOR_WHITE
+                y_pos = screen.get_height() // 2 + i * 60
+                blit_text(screen, text_cache, option_text, screen.get_width() // 2, y_pos, font, color, center=True)
+            
+            pygame.display.update(dirty_rects)
+            dirty_rects = []
         
-        for event in pygame.event.get():
+        # Sleep until input arrives instead of spinning at FPS
+        for event in [pygame.event.wait(MENU_EVENT_TIMEOUT)] + pygame.event.get():
             if event.type == pygame.QUIT:
                 return "quit"
+            if event.type == pygame.VIDEOEXPOSE:
+                dirty_rects.append(screen.get_rect())
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    selected_index = (selected_index - 1) % len(menu_options)
-                elif event.key == pygame.K_DOWN:
-                    selected_index = (selected_index + 1) % len(menu_options)
+                if event.key in (pygame.K_UP, pygame.K_DOWN):
+                    dirty_rects.append(row_rect(screen, screen.get_height() // 2 + selected_index * 60, font))
+                    step = -1 if event.key == pygame.K_UP else 1
+                    selected_index = (selected_index + step) % len(menu_options)
+                    dirty_rects.append(row_rect(screen, screen.get_height() // 2 + selected_index * 60, font))
                 elif event.key == pygame.K_RETURN:
                     if selected_index == 0: return "new_game"
                     if selected_index == 1: return "quit"
                 elif event.key == pygame.K_ESCAPE:
                     return "quit"
 
-        pygame.display.flip()
-        clock.tick(FPS)
-
 def character_creation_screen(screen, font, clock):
     """Guides the player through creating a character."""
     ability_scores = ["STR", "DEX", "CON", "INT", "WIS", "CHA"]
@@ -48,73 +74,84 @@ def character_creation_screen(screen, font, clock):
     current_archetype_index = 0
     
     stage = "assign_stats" # Stages: assign_stats, choose_archetype
+    text_cache = {} # Rendered lines, reused across frames
+    dirty_rects = [screen.get_rect()] # Screen areas that changed since the last display update
 
     while True:
-        screen.fill(COLOR_BLACK)
+        # Only redraw after something changed; the screen is otherwise static
+        if dirty_rects:
+            screen.fill(COLOR_BLACK)
         
-        # Draw instructions
-        if stage == "assign_stats":
-            draw_text(screen, "Assign Your Ability Scores", screen.get_width()//2, 50, font, center=True)
-            draw_text(screen, "Use UP/DOWN to select a stat, ENTER to assign the next highest score.", screen.get_width()//2, 90, font, center=True)
-        elif stage == "choose_archetype":
-            draw_text(screen, "Choose Your Archetype", screen.get_width()//2, 50, font, center=True)
-            draw_text(screen, "Use UP/DOWN to select, ENTER to confirm.", screen.get_width()//2, 90, font, center=True)
+            # Draw instructions
+            if stage == "assign_stats":
+                blit_text(screen, text_cache, "Assign Your Ability Scores", screen.get_width()//2, 50, font, center=True)
+                blit_text(screen, text_cache, "Use UP/DOWN to select a stat, ENTER to assign the next highest score.", screen.get_width()//2, 90, font, center=True)
+            elif stage == "choose_archetype":
+                blit_text(screen, text_cache, "Choose Your Archetype", screen.get_width()//2, 50, font, center=True)
+                blit_text(screen, text_cache, "Use UP/DOWN to select, ENTER to confirm.", screen.get_width()//2, 90, font, center=True)
 
 
-        # --- Stat Assignment Stage ---
-        if stage == "assign_stats":
-            # Display rolled scores
-            draw_text(screen, "Your Rolls:", 100, 150, font)
-            for i, score in enumerate(rolled_scores):
-                color = COLOR_GREY if i < len(assigned_scores) else COLOR_WHITE
-                draw_text(screen, str(score), 120, 190 + i * 40, font, color=color)
+            # --- Stat Assignment Stage ---
+            if stage == "assign_stats":
+                # Display rolled scores
+                blit_text(screen, text_cache, "Your Rolls:", 100, 150, font)
+                for i, score in enumerate(rolled_scores):
+                    color = COLOR_GREY if i < len(assigned_scores) else COLOR_WHITE
+                    blit_text(screen, text_cache, str(score), 120, 190 + i * 40, font, color=color)
 
-            # Display stats to be assigned
-            for i, stat in enumerate(ability_scores):
-                color = COLOR_SELECTED if i == current_stat_index else COLOR_WHITE
-                value = assigned_scores.get(stat, "__")
-                draw_text(screen, f"{stat}: {value}", 400, 190 + i * 40, font, color=color)
+                # Display stats to be assigned
+                for i, stat in enumerate(ability_scores):
+                    color = COLOR_SELECTED if i == current_stat_index else COLOR_WHITE
+                    value = assigned_scores.get(stat, "__")
+                    blit_text(screen, text_cache, f"{stat}: {value}", 400, 190 + i * 40, font, color=color)
         
-        # --- Archetype Selection Stage ---
-        elif stage == "choose_archetype":
-            for i, archetype in enumerate(archetypes):
-                color = COLOR_SELECTED if i == current_archetype_index else COLOR_WHITE
-                draw_text(screen, archetype, screen.get_width()//2, 200 + i * 60, font, color=color, center=True)
+            # --- Archetype Selection Stage ---
+            elif stage == "choose_archetype":
+                for i, archetype in enumerate(archetypes):
+                    color = COLOR_SELECTED if i == current_archetype_index else COLOR_WHITE
+                    blit_text(screen, text_cache, archetype, screen.get_width()//2, 200 + i * 60, font, color=color, center=True)
             
-            # Display archetype info
-            info = ARCHETYPES[archetypes[current_archetype_index]]
-            draw_text(screen, f"HP Die: 1d{info['hp_die']}", screen.get_width()//2, 450, font, center=True, color=COLOR_GREY)
-            draw_text(screen, f"Proficiencies: {info['proficiencies']}", screen.get_width()//2, 480, font, center=True, color=COLOR_GREY)
+                # Display archetype info
+                info = ARCHETYPES[archetypes[current_archetype_index]]
+                blit_text(screen, text_cache, f"HP Die: 1d{info['hp_die']}", screen.get_width()//2, 450, font, center=True, color=COLOR_GREY)
+                blit_text(screen, text_cache, f"Proficiencies: {info['proficiencies']}", screen.get_width()//2, 480, font, center=True, color=COLOR_GREY)
 
+            pygame.display.update(dirty_rects)
+            dirty_rects = []
 
-        for event in pygame.event.get():
+        # Sleep until input arrives instead of spinning at FPS
+        for event in [pygame.event.wait(MENU_EVENT_TIMEOUT)] + pygame.event.get():
             if event.type == pygame.QUIT:
                 return None
+            if event.type == pygame.VIDEOEXPOSE:
+                dirty_rects.append(screen.get_rect())
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     return None # Go back to title screen
                 
                 if stage == "assign_stats":
-                    if event.key == pygame.K_UP:
-                        current_stat_index = (current_stat_index - 1) % len(ability_scores)
-                    elif event.key == pygame.K_DOWN:
-                        current_stat_index = (current_stat_index + 1) % len(ability_scores)
+                    if event.key in (pygame.K_UP, pygame.K_DOWN):
+                        dirty_rects.append(row_rect(screen, 190 + current_stat_index * 40, font))
+                        step = -1 if event.key == pygame.K_UP else 1
+                        current_stat_index = (current_stat_index + step) % len(ability_scores)
+                        dirty_rects.append(row_rect(screen, 190 + current_stat_index * 40, font))
                     elif event.key == pygame.K_RETURN:
                         stat_to_assign = ability_scores[current_stat_index]
                         if stat_to_assign not in assigned_scores:
                             assigned_scores[stat_to_assign] = rolled_scores[len(assigned_scores)]
+                            dirty_rects.append(screen.get_rect()) # Rolls column, stat value or a new stage
                             if len(assigned_scores) == len(ability_scores):
                                 stage = "choose_archetype"
 
                 elif stage == "choose_archetype":
-                    if event.key == pygame.K_UP:
-                        current_archetype_index = (current_archetype_index - 1) % len(archetypes)
-                    elif event.key == pygame.K_DOWN:
-                        current_archetype_index = (current_archetype_index + 1) % len(archetypes)
+                    if event.key in (pygame.K_UP, pygame.K_DOWN):
+                        dirty_rects.append(row_rect(screen, 200 + current_archetype_index * 60, font))
+                        step = -1 if event.key == pygame.K_UP else 1
+                        current_archetype_index = (current_archetype_index + step) % len(archetypes)
+                        dirty_rects.append(row_rect(screen, 200 + current_archetype_index * 60, font))
+                        dirty_rects.append(row_rect(screen, 450, font)) # Archetype info lines
+                        dirty_rects.append(row_rect(screen, 480, font))
                     elif event.key == pygame.K_RETURN:
                         chosen_archetype = archetypes[current_archetype_index]
                         # Create and return the new player object
                         return Player(chosen_archetype, assigned_scores)
-
-        pygame.display.flip()
-        clock.tick(FPS)
@@ -4,6 +4,8 @@ from config import *
 
 def roll_dice(num_dice, sides):
     """Rolls a number of dice with a given number of sides."""
+    if num_dice == 1:
+        return random.randint(1, sides)
     return sum(random.randint(1, sides) for _ in range(num_dice))
 
 class Spell:
@@ -18,6 +20,20 @@ class Spell:
         self.target_type = target_type  # "single", "area", "self", "touch"
         self.save_type = save_type  # "fortitude", "reflex", "will", None
         self.save_dc = save_dc
+        
+        # Targeting geometry in map tiles (roughly 5 feet per tile)
+        if target_type == "self":
+            self.tile_range = 0
+        elif target_type == "touch":
+            self.tile_range = 1
+        else:
+            self.tile_range = range_ft // 5 if range_ft else 1
+        
+        # Area of effect radius (simplified)
+        if name == "Fireball":
+            self.area_radius = 2  # 20 foot radius = roughly 4 tiles diameter
+        else:
+            self.area_radius = 1  # Default small area
 
 # --- Spell Effect Functions ---
 
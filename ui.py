@@ -1,6 +1,7 @@
 # ui.py - Complete version with enhanced spells panel
 import pygame
 from config import *
+from spells import get_spell_by_name
 
 def draw_text(surface, text, x, y, font, color=COLOR_WHITE, bg_color=None, center=False, max_width=None):
     """Renders text, now with word-wrapping capabilities and returns number of lines rendered."""
@@ -53,8 +54,13 @@ def draw_panel(surface, rect, header=None, font=None, border_color=COLOR_WHITE):
         header_y = rect.top - font.get_height() - 5
         draw_text(surface, header, rect.centerx, header_y, font, COLOR_WHITE, center=True)
 
+_tab_icon_font = None # Created on first use, once pygame.font is initialised
+
 def draw_tabs(surface, rect, tabs, active_tab, font, has_focus):
     """Draws dynamic, rectangular ICON tabs."""
+    global _tab_icon_font
+    if _tab_icon_font is None:
+        _tab_icon_font = pygame.font.Font(FONT_NAME, FONT_SIZE + 4)
     tab_width = rect.width // len(tabs)
     x_offset = rect.left
     
@@ -74,8 +80,7 @@ def draw_tabs(surface, rect, tabs, active_tab, font, has_focus):
         else:
             pygame.draw.rect(surface, COLOR_GREY, tab_rect, 1)
 
-        icon_font = pygame.font.Font(FONT_NAME, FONT_SIZE + 4)
-        icon_surf = icon_font.render(tab_icon, True, icon_color)
+        icon_surf = _tab_icon_font.render(tab_icon, True, icon_color)
         icon_rect = icon_surf.get_rect()
         icon_rect.center = tab_rect.center
         surface.blit(icon_surf, icon_rect)
@@ -227,7 +232,7 @@ def draw_locations_panel(surface, rect, player, font):
 def draw_quests_panel(surface, rect, player, selected_index, font):
     """Draws the list of active quests."""
     y_offset = 20
-    active_quests = sorted(player.quest_log.active_quests.keys())
+    active_quests = player.quest_log.sorted_active_names()
     if not active_quests:
         draw_text(surface, "No active quests", rect.centerx, rect.centery, font, COLOR_GREY, center=True)
         return
@@ -267,7 +272,6 @@ def draw_spells_panel(surface, rect, player, selected_index, font):
             color = COLOR_SELECTED if i == selected_index else COLOR_WHITE
             
             # Check spell status
-            from spells import get_spell_by_name
             spell = get_spell_by_name(spell_name)
             if spell:
                 is_prepared = spell_name in player.prepared_spells.get(spell.level, [])
@@ -381,15 +385,12 @@ def draw_pause_menu_window(surface, rect, selected_index, font):
     """Draws the pause menu with save/load/quit options."""
     draw_panel(surface, rect, "Game Menu", font, COLOR_WHITE)
     
-    # Menu options
-    options = ["Resume", "Save Game", "Load Game", "Quit to Title"]
-    
     # Draw title
     draw_text(surface, "Game Paused", rect.centerx, rect.top + 20, font, COLOR_WHITE, center=True)
     
     # Draw options
     y_offset = 60
-    for i, option in enumerate(options):
+    for i, option in enumerate(PAUSE_MENU_OPTIONS):
         color = COLOR_SELECTED if i == selected_index else COLOR_WHITE
         draw_text(surface, option, rect.centerx, rect.top + y_offset, font, color, center=True)
         y_offset += 35